@@ -1,24 +1,34 @@
-from typing import Iterable, List, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
 
 import streamlit as st
 
 
+@lru_cache(maxsize=8)
+def _period_lookup(
+    tab_definitions: Tuple[Tuple[str, str], ...],
+) -> Tuple[List[str], Dict[str, str]]:
+    """Подписи периодов и словарь подпись → ключ (строятся один раз на набор табов)."""
+    period_labels = [period_label for period_label, _ in tab_definitions]
+    label_to_key = dict(tab_definitions)
+    return period_labels, label_to_key
+
+
 def render_database_toolbar(
     *,
     tab_definitions: Iterable[Tuple[str, str]],
     session_prefix: str,
     label: str = "Период",
 ):
-    tab_definitions = list(tab_definitions)
+    tab_definitions = tuple(tab_definitions)
     if not tab_definitions:
         raise ValueError("tab_definitions must not be empty")
+    period_labels, label_to_key = _period_lookup(tab_definitions)
 
     actions_col, _, period_col = st.columns(
         [0.3, 0.2, 0.5], vertical_alignment="bottom")
 
     with period_col:
-        period_labels: List[str] = [
-            period_label for period_label, _ in tab_definitions]
         default_label = st.session_state.get(
             f"{session_prefix}_active_period", period_labels[0]
         )
@@ -31,7 +41,6 @@ def render_database_toolbar(
         )
 
     actions_placeholder = actions_col.container()
-    label_to_key = {label: key for label, key in tab_definitions}
     selected_tab_key = label_to_key.get(selected_label, tab_definitions[0][1])
     previous_tab_key = st.session_state.get(f"{session_prefix}_visible_tab")
     tab_changed = previous_tab_key != selected_tab_key
@@ -1,16 +1,30 @@
 """Общие вспомогательные функции для фильтров сущностей."""
 
 from datetime import date, timedelta
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Any, Optional, Tuple
 
-TAB_DEFINITIONS = [
+from config import ASSETS, TRADE_RESULT_VALUES, TRADE_SESSION_VALUES, TRADE_STATE_VALUES
+
+TAB_DEFINITIONS = (
     ("Today", "today"),
     ("Current week", "week"),
     ("Current month", "month"),
     ("Current quarter", "quarter"),
     ("Current year", "year"),
     ("Custom", "custom"),
-]
+)
+
+# Варианты селектов фильтра сделок и позиции значений в них.
+# Модуль импортируется один раз, поэтому словари не пересобираются на rerun.
+ASSET_FILTER_OPTIONS = ["Все"] + ASSETS
+STATE_FILTER_OPTIONS = ["Все"] + TRADE_STATE_VALUES
+RESULT_FILTER_OPTIONS = ["Все"] + TRADE_RESULT_VALUES
+SESSION_FILTER_OPTIONS = ["Все"] + TRADE_SESSION_VALUES
+ASSET_FILTER_INDEX = {value: idx for idx, value in enumerate(ASSET_FILTER_OPTIONS)}
+STATE_FILTER_INDEX = {value: idx for idx, value in enumerate(STATE_FILTER_OPTIONS)}
+RESULT_FILTER_INDEX = {value: idx for idx, value in enumerate(RESULT_FILTER_OPTIONS)}
+SESSION_FILTER_INDEX = {value: idx for idx, value in enumerate(SESSION_FILTER_OPTIONS)}
 
 
 def tab_date_range(tab_key: str) -> Tuple[Optional[date], Optional[date]]:
@@ -35,6 +49,42 @@ def tab_date_range(tab_key: str) -> Tuple[Optional[date], Optional[date]]:
     return None, None
 
 
+@lru_cache(maxsize=32)
+def _tab_range_iso(
+    tab_key: str,
+    today_ordinal: int,
+) -> Tuple[Optional[str], Optional[str]]:
+    date_from, date_to = tab_date_range(tab_key)
+    return (
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None,
+    )
+
+
+def tab_date_range_iso(tab_key: str) -> Tuple[Optional[str], Optional[str]]:
+    """Диапазон таба в ISO-строках; кэш меняется вместе с текущей датой."""
+    return _tab_range_iso(tab_key, date.today().toordinal())
+
+
+# Неизменяемый ключ фильтров: отсортированные пары (поле, значение)
+FiltersKey = Tuple[Tuple[str, Any], ...]
+
+
+@lru_cache(maxsize=64)
+def build_filters_key(
+    filters_items: FiltersKey,
+    date_from: Optional[str],
+    date_to: Optional[str],
+) -> FiltersKey:
+    """Собирает неизменяемый ключ фильтров (с датами в ISO) для кэша выборок."""
+    items = dict(filters_items)
+    if date_from:
+        items["date_from"] = date_from
+    if date_to:
+        items["date_to"] = date_to
+    return tuple(sorted(items.items()))
+
+
 def ensure_custom_range(
     initial_range: Optional[Tuple[Optional[date], Optional[date]]],
     *,
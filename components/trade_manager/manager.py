@@ -63,6 +63,22 @@ RESULT_PLACEHOLDER = "— Not set —"
 CREATE_ALLOWED_STATUSES = ["open", "missed"]
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _account_options() -> Dict[str, Optional[int]]:
+    """Селект счетов для модалок; счета меняются редко, поэтому кэш на 5 минут."""
+    return option_with_placeholder(
+        list_accounts(),
+        placeholder="— Account not selected —",
+        formatter=lambda acc: f"{acc['name']} (#{acc['id']})",
+    )
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_trade(trade_id: int) -> Optional[Dict[str, Any]]:
+    """Сделка для модалки: виджеты диалога перезапускают его на каждое изменение."""
+    return get_trade_by_id(trade_id)
+
+
 def render_trade_creator(
     *,
     on_created: Optional[Callable[[int], None]] = None,
@@ -74,11 +90,7 @@ def render_trade_creator(
     def _dialog() -> None:
         trade_key = f"trade_creator"
 
-        accounts = option_with_placeholder(
-            list_accounts(),
-            placeholder="— Account not selected —",
-            formatter=lambda acc: f"{acc['name']} (#{acc['id']})",
-        )
+        accounts = _account_options()
         setups = option_with_placeholder(
             list_setups(),
             placeholder="— Setup not selected —",
@@ -163,6 +175,7 @@ def render_trade_creator(
 def render_trade_editor(
     *,
     trade_id: Optional[int],
+    on_saved: Optional[Callable[[], None]] = None,
     on_close: Optional[Callable[[], None]] = None,
 ) -> None:
     """Показыввает модалку для редактирования существующих сделок."""
@@ -172,18 +185,14 @@ def render_trade_editor(
         if not trade_id:
             st.info("Сделка не выбрана.")
             return
-        trade = get_trade_by_id(trade_id)
+        trade = _cached_trade(trade_id)
         if not trade:
             st.error("Сделка не найдена.")
             return
 
         trade_key = f"edit_{trade_id}"
 
-        accounts = option_with_placeholder(
-            list_accounts(),
-            placeholder="— Account not selected —",
-            formatter=lambda acc: f"{acc['name']} (#{acc['id']})",
-        )
+        accounts = _account_options()
         setups = option_with_placeholder(
             list_setups(),
             placeholder="— Setup not selected —",
@@ -359,7 +368,10 @@ def render_trade_editor(
                     trade_id, chart_id),
             )
             update_trade(trade_id, payload)
+            _cached_trade.clear()
             st.success("Trade updated.")
+            if on_saved:
+                on_saved()
             st.rerun()
         except Exception as exc:  # pragma: no cover - UI feedback
             st.error(f"Failed to persist the trade: {exc}")
@@ -397,6 +409,7 @@ def render_trade_remover(
         if confirm:
             try:
                 delete_trade(trade_id)
+                _cached_trade.clear()
                 st.success("Сделка удалена.")
                 if on_deleted:
                     on_deleted()
@@ -3,6 +3,7 @@
 from typing import Any, Dict, List, Optional, Set
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
 from db import (
     add_note,
@@ -68,10 +69,11 @@ def render_notes_section(
                         body_value,
                     )
                     attach_note_to_trade(trade_id, note_id)
-                    st.success("Note created and attached.")
-                    st.rerun()
                 except Exception as exc:  # pragma: no cover - UI feedback
                     st.error(f"Failed to add note: {exc}")
+                else:
+                    st.success("Note created and attached.")
+                    _rerun_dialog()
 
 
 def _note_label(note: Optional[Dict[str, Any]]) -> str:
@@ -101,7 +103,18 @@ def _sync_note_links(
             attach_note_to_trade(trade_id, note_id)
         for note_id in to_detach:
             detach_note_from_trade(trade_id, note_id)
-        st.success("Notes updated.")
-        st.rerun()
     except Exception as exc:  # pragma: no cover - UI feedback
         st.error(f"Failed to update notes: {exc}")
+    else:
+        st.success("Notes updated.")
+        _rerun_dialog()
+
+
+def _rerun_dialog() -> None:
+    # Секция живёт внутри st.dialog — перерисовываем только его. Но scope="fragment"
+    # допустим лишь во время rerun фрагмента; при полном прогоне (открытие диалога)
+    # Streamlit бросает StreamlitAPIException — тогда перезапускаем всё приложение.
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
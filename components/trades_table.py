@@ -1,9 +1,59 @@
 from typing import Optional, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
 
+# Поля сделки, которые нужны таблице (id — для выбора строки)
+TABLE_SOURCE_COLUMNS = [
+    "id",
+    "date_local",
+    "time_local",
+    "asset",
+    "state",
+    "result",
+    "net_pnl",
+    "risk_reward",
+    "session",
+]
+# Повторяющиеся строковые значения храним как category — меньше памяти и Arrow
+CATEGORY_COLUMNS = ("asset", "state", "result", "session")
+
+
+def _build_table(rows) -> Tuple[np.ndarray, pa.Table]:
+    """Приводит данные к человекочитаемому виду (русские заголовки, форматы дат/времени)."""
+    df = pd.DataFrame.from_records(rows, columns=TABLE_SOURCE_COLUMNS)
+    df = df.astype({
+        "id": "Int64",
+        "net_pnl": "float64",
+        "risk_reward": "float64",
+        **{col: "category" for col in CATEGORY_COLUMNS},
+    })
+    # Собираем итоговую таблицу сразу, без промежуточных rename/insert
+    columns = {
+        # Даты и время в базе хранятся в ISO — format="ISO8601" идёт по быстрому пути
+        "Дата": pd.to_datetime(
+            df["date_local"], format="ISO8601", errors="coerce"),
+        # Время оставляем datetime64 (фиктивная дата): TimeColumn покажет только время
+        "Время": pd.to_datetime(
+            "1970-01-01 " + df["time_local"], format="ISO8601", errors="coerce"),
+        "Инструмент": df["asset"],
+        "Состояние": df["state"],
+        "Результат": df["result"],
+        "PnL": df["net_pnl"],
+        "R:R": df["risk_reward"],
+        "Сессия": df["session"],
+    }
+    # Кодируем в Arrow один раз: st.dataframe принимает pa.Table без повторной конверсии
+    table = pa.Table.from_pandas(
+        pd.DataFrame(columns, copy=False), preserve_index=False)
+    # id строк заранее выносим в массив: выбор строки — просто индекс в нём
+    ids = df["id"].to_numpy(dtype="int64")
+    return ids, table
+
+
 def render_trades_table(
     rows,
     tab_key: str,
@@ -13,36 +63,18 @@ def render_trades_table(
         st.info("Нет сделок для выбранного периода.")
         return False, None
 
-    # Приводим данные к человекочитаемому виду (русские заголовки, форматы дат/времени)
-    df = pd.DataFrame(rows)
-    display_columns = [
-        "date_local",
-        "asset",
-        "state",
-        "result",
-        "net_pnl",
-        "risk_reward",
-        "session",
-    ]
-    table = df[display_columns].rename(columns={
-        "date_local": "Дата",
-        "asset": "Инструмент",
-        "state": "Состояние",
-        "result": "Результат",
-        "net_pnl": "PnL",
-        "risk_reward": "R:R",
-        "session": "Сессия",
-    })
-    table["Дата"] = pd.to_datetime(table["Дата"], errors="coerce")
-    if "time_local" in df.columns:
-        table.insert(
-            1,
-            "Время",
-            pd.to_datetime(df["time_local"], errors="coerce").dt.time,
-        )
-
     # Храним отдельный ключ таблицы для каждого периода, чтобы isolировать выбор
     table_key = f"trades_table_{tab_key}"
+
+    # Пока строки не изменились, переиспользуем готовую Arrow-таблицу из session_state
+    frame_key = f"{table_key}_frame"
+    cached = st.session_state.get(frame_key)
+    if cached is not None and (cached[0] is rows or cached[0] == rows):
+        ids, table = cached[1], cached[2]
+    else:
+        ids, table = _build_table(rows)
+        st.session_state[frame_key] = (rows, ids, table)
+
     st.dataframe(
         table,
         key=table_key,
@@ -73,4 +105,4 @@ def render_trades_table(
         return True, None
 
     selected_idx = current_selection[-1]
-    return True, int(df.iloc[selected_idx]["id"])
+    return True, int(ids[selected_idx])
@@ -1,9 +1,11 @@
 # db.py — SQLite wrapper for Trade Journal (Python 3.9)
+import functools
 import json
 import os
 import sqlite3
+import threading
 from datetime import date, datetime, time, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # Справочники вынесены в config.py
 from config import (
@@ -29,7 +31,7 @@ def _enum_sql(values: List[str]) -> str:
 # =====================================================================
 
 
-TRADE_ORDER_COLUMNS = {
+TRADE_ORDER_COLUMNS = frozenset({
     "id",
     "date_local",
     "time_local",
@@ -43,7 +45,7 @@ TRADE_ORDER_COLUMNS = {
     "net_pnl",
     "risk_reward",
     "reward_percent",
-}
+})
 
 ANALYSIS_COLUMNS = [
     "id",
@@ -77,6 +79,19 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "journal.db")
 
 
+# Запись сериализуем внутри процесса (Streamlit крутит скрипты в разных
+# потоках); чтение идёт без блокировки — в режиме WAL оно не мешает писателю.
+_WRITE_LOCK = threading.RLock()
+
+
+def _locked_write(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _WRITE_LOCK:
+            return func(*args, **kwargs)
+    return wrapper
+
+
 def _ensure_dirs() -> None:
     os.makedirs(BASE_DIR, exist_ok=True)
 
@@ -335,8 +350,12 @@ CREATE TABLE IF NOT EXISTS setup_charts (
 -- ИНДЕКСЫ
 -- =========================
 
-CREATE INDEX IF NOT EXISTS idx_trades_date_local   ON trades(date_local);
-CREATE INDEX IF NOT EXISTS idx_trades_account      ON trades(account_id);
+-- Фильтр по периоду (и периоду + счёту) и фильтр по счёту (+ период)
+CREATE INDEX IF NOT EXISTS idx_trades_date_account ON trades(date_local, account_id);
+CREATE INDEX IF NOT EXISTS idx_trades_account_date ON trades(account_id, date_local);
+-- Одиночные индексы — префиксы составных выше, поэтому удаляем их
+DROP INDEX IF EXISTS idx_trades_date_local;
+DROP INDEX IF EXISTS idx_trades_account;
 CREATE INDEX IF NOT EXISTS idx_trades_asset        ON trades(asset);
 CREATE INDEX IF NOT EXISTS idx_trades_result       ON trades(result);
 CREATE INDEX IF NOT EXISTS idx_trades_setup        ON trades(setup_id);
@@ -351,6 +370,7 @@ def init_db() -> None:
     _ensure_dirs()
     conn = get_conn()
     try:
+        conn.execute("PRAGMA journal_mode=WAL;")
         conn.executescript(SCHEMA_SQL)
         conn.commit()
     finally:
@@ -361,6 +381,7 @@ def init_db() -> None:
 # =====================================================================
 
 
+@_locked_write
 def create_account(name: str, broker: Optional[str] = None,
                    currency: str = "USD",
                    starting_balance: Optional[float] = None,
@@ -390,6 +411,7 @@ def list_accounts() -> List[Dict[str, Any]]:
         conn.close()
 
 
+@_locked_write
 def create_setup(name: str, description: Optional[str] = None) -> int:
     conn = get_conn()
     try:
@@ -418,6 +440,7 @@ def list_setups() -> List[Dict[str, Any]]:
 # =====================================================================
 
 
+@_locked_write
 def add_note(title: Optional[str], body: str,
              tags: Optional[str] = None,
              category: Optional[str] = None) -> int:
@@ -434,6 +457,7 @@ def add_note(title: Optional[str], body: str,
         conn.close()
 
 
+@_locked_write
 def update_note(note_id: int, title: Optional[str], body: str,
                 tags: Optional[str] = None) -> None:
     conn = get_conn()
@@ -454,6 +478,7 @@ def update_note(note_id: int, title: Optional[str], body: str,
         conn.close()
 
 
+@_locked_write
 def delete_note(note_id: int) -> None:
     conn = get_conn()
     try:
@@ -503,6 +528,7 @@ def list_trade_notes(trade_id: int) -> List[Dict[str, Any]]:
         conn.close()
 
 
+@_locked_write
 def attach_note_to_trade(trade_id: int, note_id: int) -> None:
     conn = get_conn()
     try:
@@ -521,6 +547,7 @@ def attach_note_to_trade(trade_id: int, note_id: int) -> None:
         conn.close()
 
 
+@_locked_write
 def detach_note_from_trade(trade_id: int, note_id: int) -> None:
     conn = get_conn()
     try:
@@ -538,6 +565,7 @@ def detach_note_from_trade(trade_id: int, note_id: int) -> None:
 # =====================================================================
 
 
+@_locked_write
 def add_chart(chart_url: str, caption: Optional[str] = None) -> int:
     if not chart_url:
         raise ValueError("chart_url is required.")
@@ -567,6 +595,7 @@ def get_chart(chart_id: int) -> Optional[Dict[str, Any]]:
         conn.close()
 
 
+@_locked_write
 def update_chart(chart_id: int, chart_url: str,
                  caption: Optional[str] = None) -> None:
     if not chart_url:
@@ -591,6 +620,7 @@ def update_chart(chart_id: int, chart_url: str,
         conn.close()
 
 
+@_locked_write
 def delete_chart(chart_id: int) -> None:
     conn = get_conn()
     try:
@@ -630,6 +660,7 @@ def list_trade_charts(trade_id: int) -> List[Dict[str, Any]]:
         conn.close()
 
 
+@_locked_write
 def attach_chart_to_trade(trade_id: int, chart_id: int) -> None:
     conn = get_conn()
     try:
@@ -648,6 +679,7 @@ def attach_chart_to_trade(trade_id: int, chart_id: int) -> None:
         conn.close()
 
 
+@_locked_write
 def detach_chart_from_trade(trade_id: int, chart_id: int) -> None:
     conn = get_conn()
     try:
@@ -677,6 +709,7 @@ ANALYSIS_ORDER_COLUMNS = {
 }
 
 
+@_locked_write
 def add_analysis(data: Dict[str, Any]) -> int:
     """
     data keys: local_tz, date_local, time_local, state, asset, daily_bias, fact_bias,
@@ -755,6 +788,7 @@ def list_analysis(filters: Optional[Dict[str, Any]] = None,
         conn.close()
 
 
+@_locked_write
 def update_analysis(analysis_id: int, data: Dict[str, Any]) -> None:
     payload = _normalize_analysis_payload(data)
     if not payload:
@@ -777,6 +811,7 @@ def update_analysis(analysis_id: int, data: Dict[str, Any]) -> None:
         conn.close()
 
 
+@_locked_write
 def delete_analysis(analysis_id: int) -> None:
     conn = get_conn()
     try:
@@ -793,11 +828,35 @@ def delete_analysis(analysis_id: int) -> None:
 # Trade queries
 # =====================================================================
 
+TRADE_COLUMNS = [
+    "id",
+    "local_tz",
+    "date_local",
+    "time_local",
+    "account_id",
+    "setup_id",
+    "analysis_id",
+    "asset",
+    "risk_pct",
+    "session",
+    "state",
+    "result",
+    "net_pnl",
+    "risk_reward",
+    "reward_percent",
+    "estimation",
+    "emotional_problems",
+    "hot_thoughts",
+    "cold_thoughts",
+]
+
+_SQL_GET_TRADE = f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades WHERE id=?"
+
+
 def get_trade_by_id(trade_id: int) -> Optional[Dict[str, Any]]:
     conn = get_conn()
     try:
-        row = conn.execute("SELECT * FROM trades WHERE id=?",
-                           (trade_id,)).fetchone()
+        row = conn.execute(_SQL_GET_TRADE, (trade_id,)).fetchone()
         return dict(row) if row else None
     finally:
         conn.close()
@@ -842,6 +901,7 @@ def _normalize_trade_payload(data: Dict[str, Any]) -> Dict[str, Any]:
     return payload
 
 
+@_locked_write
 def create_trade(data: Dict[str, Any]) -> int:
     payload = _normalize_trade_payload(data)
     if not payload:
@@ -864,6 +924,7 @@ def create_trade(data: Dict[str, Any]) -> int:
         conn.close()
 
 
+@_locked_write
 def update_trade(trade_id: int, data: Dict[str, Any]) -> None:
     payload = _normalize_trade_payload(data)
     if not payload:
@@ -886,6 +947,7 @@ def update_trade(trade_id: int, data: Dict[str, Any]) -> None:
         conn.close()
 
 
+@_locked_write
 def delete_trade(trade_id: int) -> None:
     conn = get_conn()
     try:
@@ -898,28 +960,6 @@ def delete_trade(trade_id: int) -> None:
         conn.close()
 
 
-TRADE_COLUMNS = [
-    "id",
-    "local_tz",
-    "date_local",
-    "time_local",
-    "account_id",
-    "setup_id",
-    "analysis_id",
-    "asset",
-    "risk_pct",
-    "session",
-    "state",
-    "result",
-    "net_pnl",
-    "risk_reward",
-    "reward_percent",
-    "estimation",
-    "emotional_problems",
-    "hot_thoughts",
-    "cold_thoughts",
-]
-
 TRADE_COMPAT_COLUMNS = [
     "result AS trade_result",
     "risk_reward AS rr",
@@ -928,13 +968,28 @@ TRADE_COMPAT_COLUMNS = [
     "time_local AS open_time",
 ]
 
+_TRADE_SELECT_CLAUSE = ", ".join(TRADE_COLUMNS + TRADE_COMPAT_COLUMNS)
+
+# Готовые хвосты ORDER BY для каждой допустимой колонки и направления.
+# id в конце делает порядок однозначным — иначе LIMIT/OFFSET может терять строки.
+_TRADE_ORDER_SUFFIX = {
+    (column, ascending): (
+        f" ORDER BY {column} {'ASC' if ascending else 'DESC'}"
+        + ("" if column == "id" else f", id {'ASC' if ascending else 'DESC'}")
+    )
+    for column in TRADE_ORDER_COLUMNS
+    for ascending in (True, False)
+}
+# Хронологический порядок по умолчанию (ascending=False — сначала новые).
+_TRADE_DEFAULT_ORDER = {
+    True: " ORDER BY date_local ASC, time_local ASC, id ASC",
+    False: " ORDER BY date_local DESC, time_local DESC, id DESC",
+}
+
 
-def list_trades(filters: Optional[Dict[str, Any]] = None,
-                order_by: Optional[str] = None,
-                ascending: bool = True) -> List[Dict[str, Any]]:
-    filters = filters or {}
-    select_clause = ", ".join(TRADE_COLUMNS + TRADE_COMPAT_COLUMNS)
-    q = f"SELECT {select_clause} FROM trades WHERE 1=1"
+def _trade_filters_sql(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """WHERE-часть (с плейсхолдерами) и параметры для фильтров сделок."""
+    q = " WHERE 1=1"
     p: List[Any] = []
 
     mapping = {
@@ -957,14 +1012,29 @@ def list_trades(filters: Optional[Dict[str, Any]] = None,
         elif k in mapping:
             q += f" AND {mapping[k]} = ?"
             p.append(v)
+    return q, p
+
+
+def list_trades(filters: Optional[Dict[str, Any]] = None,
+                order_by: Optional[str] = None,
+                ascending: bool = True,
+                limit: Optional[int] = None,
+                offset: int = 0) -> List[Dict[str, Any]]:
+    where, p = _trade_filters_sql(filters or {})
+    q = f"SELECT {_TRADE_SELECT_CLAUSE} FROM trades{where}"
 
     if order_by:
         if order_by not in TRADE_ORDER_COLUMNS:
             raise ValueError(
                 f"order_by must be one of: {sorted(TRADE_ORDER_COLUMNS)}")
-        q += f" ORDER BY {order_by} {'ASC' if ascending else 'DESC'}"
+        q += _TRADE_ORDER_SUFFIX[(order_by, bool(ascending))]
     else:
-        q += " ORDER BY date_local ASC, id ASC"
+        q += _TRADE_DEFAULT_ORDER[bool(ascending)]
+
+    if limit is not None or offset:
+        # LIMIT -1 в SQLite — «без ограничения», чтобы offset работал и без limit
+        q += " LIMIT ? OFFSET ?"
+        p.extend([-1 if limit is None else int(limit), int(offset)])
 
     conn = get_conn()
     try:
@@ -974,6 +1044,18 @@ def list_trades(filters: Optional[Dict[str, Any]] = None,
         conn.close()
 
 
+def count_trades(filters: Optional[Dict[str, Any]] = None) -> int:
+    """Количество сделок под фильтрами (для постраничного вывода)."""
+    where, p = _trade_filters_sql(filters or {})
+    conn = get_conn()
+    try:
+        row = conn.execute(f"SELECT COUNT(*) FROM trades{where}", p).fetchone()
+        return int(row[0])
+    finally:
+        conn.close()
+
+
+@_locked_write
 def seed_test_trades(count: int = 10) -> None:
     """
     Insert synthetic trades for manual testing/demo purposes.
@@ -1,4 +1,7 @@
+import re
 from datetime import date, datetime, time
+from functools import lru_cache
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from config import PAGES
@@ -30,21 +33,36 @@ def apply_page_config(page_key: str):
     st.title(f"{options['icon']} {options['title']}")
 
 
+@lru_cache(maxsize=32)
+def _page_key_from_file(file: str) -> str:
+    return Path(file).stem
+
+
 def apply_page_config_from_file(file):
-    from pathlib import Path
-    return apply_page_config(Path(file).stem)
+    # st.set_page_config нужно вызывать на каждом rerun, кэшируем только разбор пути
+    return apply_page_config(_page_key_from_file(file))
 
 
 # --- Trade helpers (можно переиспользовать в различных компонентах) ---
+# Форматы "%H:%M:%S" / "%H:%M" и "%Y-%m-%d" / "%d.%m.%Y" разбираем одной
+# заранее скомпилированной регуляркой вместо перебора strptime.
+# fullmatch + re.ASCII: как и strptime, не принимаем хвостовой "\n" и не-ASCII цифры.
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?", re.ASCII)
+_DATE_RE = re.compile(
+    r"(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})\.(\d{1,2})\.(\d{4})", re.ASCII)
+
+
 def parse_trade_time(value: Optional[str]) -> time:
     if isinstance(value, time):
         return value
     if isinstance(value, str):
-        for fmt in ("%H:%M:%S", "%H:%M"):
+        match = _TIME_RE.fullmatch(value)
+        if match:
+            hour, minute, second = match.groups()
             try:
-                return datetime.strptime(value, fmt).time()
+                return time(int(hour), int(minute), int(second or 0))
             except ValueError:
-                continue
+                pass
     now = datetime.now().time()
     return time(hour=now.hour, minute=now.minute, second=0)
 
@@ -53,11 +71,15 @@ def parse_trade_date(value: Optional[str]) -> date:
     if isinstance(value, date):
         return value
     if isinstance(value, str):
-        for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        match = _DATE_RE.fullmatch(value)
+        if match:
+            year, month, day, day_ru, month_ru, year_ru = match.groups()
             try:
-                return datetime.strptime(value, fmt).date()
+                if year:
+                    return date(int(year), int(month), int(day))
+                return date(int(year_ru), int(month_ru), int(day_ru))
             except ValueError:
-                continue
+                pass
     return date.today()
 
 
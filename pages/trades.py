@@ -1,5 +1,6 @@
 from datetime import date, timedelta
-from typing import Dict, Optional, Tuple
+from math import ceil
+from typing import Any, Dict, List, Optional, Tuple
 
 import streamlit as st
 
@@ -8,50 +9,78 @@ from components.database_toolbar import (
     render_database_toolbar,
 )
 from components.entity_filters import (
+    ASSET_FILTER_INDEX,
+    ASSET_FILTER_OPTIONS,
+    RESULT_FILTER_INDEX,
+    RESULT_FILTER_OPTIONS,
+    SESSION_FILTER_INDEX,
+    SESSION_FILTER_OPTIONS,
+    STATE_FILTER_INDEX,
+    STATE_FILTER_OPTIONS,
     TAB_DEFINITIONS,
+    FiltersKey,
+    build_filters_key,
     ensure_custom_range,
-    tab_date_range,
+    tab_date_range_iso,
 )
-from config import ASSETS, TRADE_RESULT_VALUES, TRADE_SESSION_VALUES, TRADE_STATE_VALUES
 from components.trades_table import render_trades_table
-from components.trade_manager import (
-    render_trade_creator,
-    render_trade_editor,
-    render_trade_remover,
-
-)
-from db import list_trades, list_accounts
+from db import count_trades, list_trades, list_accounts
 from helpers import apply_page_config_from_file
 
 # --- Базовая настройка страницы под Streamlit ---
 apply_page_config_from_file(__file__)
 
-# --- Первичные значения фильтров и диапазона дат ---
-today = date.today()
-st.session_state.setdefault("trades_active_filters", {})
-st.session_state.setdefault(
-    "trades_custom_range",
-    (
-        today - timedelta(days=7),
-        today,
-    ),
-)
-
-# --- Инициализируем рабочие флаги и выбранную сделку ---
-st.session_state.setdefault("selected_trade_id", None)
-st.session_state.setdefault("show_create_trade", False)
-st.session_state.setdefault("show_edit_trade", False)
-st.session_state.setdefault("show_delete_trade", False)
-
-
+# --- Сколько сделок показываем на одной странице таблицы ---
+TRADES_PAGE_SIZE = 100
+
+# --- Первичные значения фильтров, диапазона дат, выбранной сделки и модалки ---
+# Заполняем один раз за сессию, а не проверяем каждый ключ на каждом rerun
+if "_trades_initialized" not in st.session_state:
+    today = date.today()
+    st.session_state.update({
+        "trades_active_filters": {},
+        "trades_custom_range": (today - timedelta(days=7), today),
+        "selected_trade_id": None,
+        "trades_dialog": None,
+        "trades_page": 0,
+        "trades_page_filters": None,
+        "_trades_initialized": True,
+    })
+
+
+@st.cache_data(ttl=300, show_spinner=False)
 def account_options() -> Dict[str, Optional[int]]:
-    """Формирует удобный для отображения список счетов с их ID."""
+    """Формирует удобный для отображения список счетов с их ID (кэш на 5 минут)."""
     options: Dict[str, Optional[int]] = {"Все счета": None}
     for account in list_accounts():
         options[f"{account['name']} (#{account['id']})"] = account["id"]
     return options
 
 
+@st.cache_resource(ttl=60, show_spinner=False)
+def _cached_list_trades(filters_items: FiltersKey, page: int) -> List[Dict[str, Any]]:
+    """Кэширует страницу сделок (сначала новые) по набору фильтров (dict не хэшируется, поэтому кортеж).
+
+    cache_resource отдаёт один и тот же объект без pickle-копии — строки только читаем.
+    """
+    return list_trades(
+        dict(filters_items),
+        ascending=False,
+        limit=TRADES_PAGE_SIZE,
+        offset=page * TRADES_PAGE_SIZE,
+    )
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_count_trades(filters_items: FiltersKey) -> int:
+    return count_trades(dict(filters_items))
+
+
+def _invalidate_trades_cache() -> None:
+    _cached_list_trades.clear()
+    _cached_count_trades.clear()
+
+
 # --- Загружаем список счетов и настраиваем state для форм ---
 account_map = account_options()
 
@@ -66,20 +95,7 @@ def _render_trades_custom_filters(
     default_from, default_to = ensure_custom_range(initial_range)
 
     account_labels = list(account_map.keys())
-    account_default_label = next(
-        (label for label, val in account_map.items()
-         if val == initial_filters.get("account_id")),
-        account_labels[0],
-    )
-
-    asset_options = ["Все"] + ASSETS
-    asset_default = initial_filters.get("asset", "Все")
-    state_options = ["Все"] + TRADE_STATE_VALUES
-    state_default = initial_filters.get("state", "Все")
-    result_options = ["Все"] + TRADE_RESULT_VALUES
-    result_default = initial_filters.get("result", "Все")
-    session_options = ["Все"] + TRADE_SESSION_VALUES
-    session_default = initial_filters.get("session", "Все")
+    account_idx = {val: idx for idx, val in enumerate(account_map.values())}
 
     with st.container():
         fc1, fc2, fc3, fc4, fc5, fc6 = st.columns(6)
@@ -91,31 +107,27 @@ def _render_trades_custom_filters(
         account_choice = fc2.selectbox(
             "Счёт",
             account_labels,
-            index=account_labels.index(account_default_label),
+            index=account_idx.get(initial_filters.get("account_id"), 0),
         )
         asset_choice = fc3.selectbox(
             "Инструмент",
-            asset_options,
-            index=asset_options.index(asset_default)
-            if asset_default in asset_options else 0,
+            ASSET_FILTER_OPTIONS,
+            index=ASSET_FILTER_INDEX.get(initial_filters.get("asset", "Все"), 0),
         )
         state_choice = fc4.selectbox(
             "Состояние",
-            state_options,
-            index=state_options.index(state_default)
-            if state_default in state_options else 0,
+            STATE_FILTER_OPTIONS,
+            index=STATE_FILTER_INDEX.get(initial_filters.get("state", "Все"), 0),
         )
         result_choice = fc5.selectbox(
             "Результат",
-            result_options,
-            index=result_options.index(result_default)
-            if result_default in result_options else 0,
+            RESULT_FILTER_OPTIONS,
+            index=RESULT_FILTER_INDEX.get(initial_filters.get("result", "Все"), 0),
         )
         session_choice = fc6.selectbox(
             "Сессия",
-            session_options,
-            index=session_options.index(session_default)
-            if session_default in session_options else 0,
+            SESSION_FILTER_OPTIONS,
+            index=SESSION_FILTER_INDEX.get(initial_filters.get("session", "Все"), 0),
         )
 
     filters: Dict[str, Optional[str]] = {}
@@ -138,8 +150,52 @@ def _render_trades_custom_filters(
     return filters, date_range
 
 
-def set_dialog_flag(flag: str, value: bool) -> None:
-    st.session_state[flag] = value
+def activate_dialog(kind: Optional[str]) -> None:
+    """Открывает модалку ("create" / "edit" / "delete") или закрывает все (None)."""
+    st.session_state["trades_dialog"] = kind
+
+
+def select_trade(trade_id: Optional[int], dialog: Optional[str] = None) -> None:
+    """Меняет выбранную сделку и открытую модалку одной записью в session_state."""
+    st.session_state.update({
+        "selected_trade_id": trade_id,
+        "trades_dialog": dialog,
+    })
+
+
+def _reset_table_selection(tab_key: str) -> None:
+    table_state_key = f"trades_table_{tab_key}"
+    st.session_state.pop(table_state_key, None)
+    st.session_state.pop(f"{table_state_key}_selection", None)
+
+
+def _go_to_page(page: int, tab_key: str) -> None:
+    st.session_state["trades_page"] = page
+    _reset_table_selection(tab_key)
+    select_trade(None)
+
+
+def _render_pagination(page: int, page_count: int, tab_key: str) -> None:
+    """Кнопки переключения страниц под таблицей."""
+    prev_col, info_col, next_col = st.columns(
+        [0.2, 0.6, 0.2], vertical_alignment="center")
+    prev_col.button(
+        "← Назад",
+        key="trades_page_prev",
+        disabled=page <= 0,
+        on_click=_go_to_page,
+        args=(page - 1, tab_key),
+        width="stretch",
+    )
+    info_col.caption(f"Страница {page + 1} из {page_count}")
+    next_col.button(
+        "Вперёд →",
+        key="trades_page_next",
+        disabled=page >= page_count - 1,
+        on_click=_go_to_page,
+        args=(page + 1, tab_key),
+        width="stretch",
+    )
 
 
 # --- Верхняя панель: слева фильтр периода, справа кнопки действий ---
@@ -150,56 +206,58 @@ selected_label, selected_tab_key, tab_changed, actions_placeholder = render_data
 
 # --- Фиксируем выбранный период и обнуляем выбор при переключении ---
 if tab_changed:
-    st.session_state["selected_trade_id"] = None
-    set_dialog_flag("show_create_trade", False)
-    set_dialog_flag("show_edit_trade", False)
-    set_dialog_flag("show_delete_trade", False)
-    table_state_key = f"trades_table_{selected_tab_key}"
-    st.session_state.pop(table_state_key, None)
-    st.session_state.pop(f"{table_state_key}_selection", None)
+    select_trade(None)
+    st.session_state["trades_page"] = 0
+    _reset_table_selection(selected_tab_key)
 st.session_state["trades_visible_tab"] = selected_tab_key
 st.session_state["trades_active_period"] = selected_label
 
 # --- Собираем итоговый фильтр для таблицы ---
+active_filters = st.session_state.get("trades_active_filters", {})
 if selected_tab_key == "custom":
     filters, custom_range = _render_trades_custom_filters(
         account_map,
-        st.session_state.get("trades_active_filters"),
+        active_filters,
         st.session_state.get("trades_custom_range"),
     )
     st.session_state["trades_active_filters"] = filters
     st.session_state["trades_custom_range"] = custom_range
-    tab_filters = filters.copy()
+    filters_items = tuple(sorted(filters.items()))
     date_from, date_to = custom_range
+    date_from_iso = date_from.isoformat() if date_from else None
+    date_to_iso = date_to.isoformat() if date_to else None
 else:
-    tab_filters = st.session_state.get("trades_active_filters", {}).copy()
-    date_from, date_to = tab_date_range(selected_tab_key)
-if date_from:
-    tab_filters["date_from"] = date_from.isoformat()
-if date_to:
-    tab_filters["date_to"] = date_to.isoformat()
+    filters_items = tuple(sorted(active_filters.items()))
+    date_from_iso, date_to_iso = tab_date_range_iso(selected_tab_key)
+filters_key = build_filters_key(filters_items, date_from_iso, date_to_iso)
+
+# --- Новый набор фильтров всегда начинаем с первой страницы ---
+if st.session_state.get("trades_page_filters") != filters_key:
+    st.session_state.update({
+        "trades_page": 0,
+        "trades_page_filters": filters_key,
+    })
+page_count = max(1, ceil(_cached_count_trades(filters_key) / TRADES_PAGE_SIZE))
+trades_page = min(st.session_state.get("trades_page", 0), page_count - 1)
 
 # --- Загружаем сделки и отслеживаем, изменилась ли выделенная строка ---
-rows = list_trades(tab_filters)
+rows = _cached_list_trades(filters_key, trades_page)
 selection_changed, selected_from_tab = render_trades_table(
     rows,
     selected_tab_key,
 )
+if page_count > 1:
+    _render_pagination(trades_page, page_count, selected_tab_key)
 if selection_changed:
     if selected_from_tab is None:
-        if not st.session_state.get("show_edit_trade"):
-            st.session_state["selected_trade_id"] = None
-            set_dialog_flag("show_create_trade", False)
-            set_dialog_flag("show_edit_trade", False)
-            set_dialog_flag("show_delete_trade", False)
+        if st.session_state.get("trades_dialog") != "edit":
+            select_trade(None)
     else:
-        st.session_state["selected_trade_id"] = selected_from_tab
-        set_dialog_flag("show_create_trade", False)
-        set_dialog_flag("show_edit_trade", False)
-        set_dialog_flag("show_delete_trade", False)
+        select_trade(selected_from_tab)
+selected_trade_id = st.session_state.get("selected_trade_id")
 
 # --- Правый блок кнопок (создание / открытие / удаление) ---
-open_disabled = st.session_state.get("selected_trade_id") is None
+open_disabled = selected_trade_id is None
 create_clicked, open_clicked, delete_clicked = render_action_buttons(
     actions_container=actions_placeholder,
     session_prefix="trades",
@@ -207,61 +265,64 @@ create_clicked, open_clicked, delete_clicked = render_action_buttons(
 )
 
 if create_clicked:
-    set_dialog_flag("show_create_trade", True)
-    set_dialog_flag("show_edit_trade", False)
-    set_dialog_flag("show_delete_trade", False)
+    activate_dialog("create")
 if open_clicked:
-    set_dialog_flag("show_edit_trade", True)
-    set_dialog_flag("show_create_trade", False)
-    set_dialog_flag("show_delete_trade", False)
+    activate_dialog("edit")
 if delete_clicked:
-    set_dialog_flag("show_delete_trade", True)
-    set_dialog_flag("show_create_trade", False)
-    set_dialog_flag("show_edit_trade", False)
+    activate_dialog("delete")
 
 
 def _close_create_dialog() -> None:
-    set_dialog_flag("show_create_trade", False)
+    activate_dialog(None)
     st.rerun()
 
 
 def _handle_trade_created(new_trade_id: int) -> None:
-    st.session_state["selected_trade_id"] = new_trade_id
-    set_dialog_flag("show_create_trade", False)
-    set_dialog_flag("show_edit_trade", True)
+    _invalidate_trades_cache()
+    select_trade(new_trade_id, "edit")
     st.rerun()
 
 
+def _handle_trade_saved() -> None:
+    _invalidate_trades_cache()
+
+
 def _close_edit_dialog() -> None:
-    set_dialog_flag("show_edit_trade", False)
+    activate_dialog(None)
     st.rerun()
 
 
 def _close_delete_dialog() -> None:
-    set_dialog_flag("show_delete_trade", False)
+    activate_dialog(None)
     st.rerun()
 
 
 def _handle_trade_deleted() -> None:
-    st.session_state["selected_trade_id"] = None
-    set_dialog_flag("show_delete_trade", False)
+    _invalidate_trades_cache()
+    select_trade(None)
     st.rerun()
 
 
-# --- В зависимости от флагов показываем нужные модалки ---
-if st.session_state.get("show_create_trade"):
+# --- В зависимости от открытой модалки показываем нужный диалог ---
+active_dialog = st.session_state.get("trades_dialog")
+# Модалки импортируем лениво: большинство rerun'ов их не открывает.
+if active_dialog == "create":
+    from components.trade_manager import render_trade_creator
     render_trade_creator(
         on_created=_handle_trade_created,
         on_cancel=_close_create_dialog,
     )
-if st.session_state.get("show_edit_trade"):
+if active_dialog == "edit":
+    from components.trade_manager import render_trade_editor
     render_trade_editor(
-        trade_id=st.session_state.get("selected_trade_id"),
+        trade_id=selected_trade_id,
+        on_saved=_handle_trade_saved,
         on_close=_close_edit_dialog,
     )
-if st.session_state.get("show_delete_trade"):
+if active_dialog == "delete":
+    from components.trade_manager import render_trade_remover
     render_trade_remover(
-        trade_id=st.session_state.get("selected_trade_id"),
+        trade_id=selected_trade_id,
         on_deleted=_handle_trade_deleted,
         on_cancel=_close_delete_dialog,
     )
@@ -4,55 +4,78 @@ import pandas as pd
 import numpy as np
 
 
+# Метрики для пустой выборки (отдаём копию, чтобы вызывающий не испортил шаблон)
+_EMPTY_METRICS: Dict[str, Any] = {
+    "count": 0,
+    "winrate": 0.0,
+    "profit_factor": 0.0,
+    "expectancy_r": 0.0,
+    "avg_r": 0.0,
+    "total_pnl": 0.0,
+    "best_trade": 0.0,
+    "worst_trade": 0.0
+}
+# Колонки, без которых метрики не посчитать
+_METRIC_COLUMNS = frozenset({"trade_result", "rr", "pnl"})
+
+
 def compute_metrics(df: pd.DataFrame) -> Dict[str, Any]:
-    if df.empty:
-        return {
-            "count": 0,
-            "winrate": 0.0,
-            "profit_factor": 0.0,
-            "expectancy_r": 0.0,
-            "avg_r": 0.0,
-            "total_pnl": 0.0,
-            "best_trade": 0.0,
-            "worst_trade": 0.0
-        }
+    if df.empty or not _METRIC_COLUMNS.issubset(df.columns):
+        return _EMPTY_METRICS.copy()
 
     # Преобразуем логическую модель в R:
     # Profit -> R = rr
     # Loss   -> R = -1
     # B/e    -> R = 0
-    r = np.where(df["trade_result"] == "Profit", df["rr"],
-                 np.where(df["trade_result"] == "Loss", -1.0, 0.0))
-    df = df.copy()
-    df["R"] = r
-
-    total_pnl = float(df["pnl"].sum())
-    wins = df[df["pnl"] > 0]["pnl"].sum()
-    losses = -df[df["pnl"] < 0]["pnl"].sum()  # модуль
-    profit_factor = float(
-        wins / losses) if losses > 0 else float("inf") if wins > 0 else 0.0
-
-    winrate = float((df["trade_result"] == "Profit").mean() * 100.0)
-    avg_win_r = df[df["R"] > 0]["R"].mean() if (df["R"] > 0).any() else 0.0
-    avg_loss_r = -df[df["R"] < 0]["R"].mean() if (df["R"] < 0).any() else 0.0
+    # Коды категорий: 0 — Profit, 1 — Loss, -1 — всё остальное (B/e)
+    codes = pd.Categorical(
+        df["trade_result"], categories=["Profit", "Loss"]).codes
+    is_profit = codes == 0
+    r = np.select([is_profit, codes == 1],
+                  [df["rr"].to_numpy(dtype=float), -1.0], default=0.0)
+
+    # Работаем с массивами numpy: маски знаков считаем один раз и переиспользуем
+    pnl = df["pnl"].to_numpy(dtype=float)
+    total_pnl = float(np.nansum(pnl))
+    wins = pnl[pnl > 0].sum()
+    losses = -pnl[pnl < 0].sum()  # модуль
+    # Округляем сразу в ветке: бесконечность возможна только без убытков
+    if losses > 0:
+        profit_factor = round(float(wins / losses), 2)
+    elif wins > 0:
+        profit_factor = float("inf")
+    else:
+        profit_factor = 0.0
+
+    winrate = float(is_profit.mean() * 100.0)
+    # Корзины по знаку R (0 — минус, 1 — ноль/пусто, 2 — плюс): суммы и количества
+    # за один проход bincount вместо отдельных масок
+    r_known = np.nan_to_num(r)
+    buckets = np.sign(r_known).astype(np.intp) + 1
+    sum_r = np.bincount(buckets, weights=r_known, minlength=3)
+    cnt_r = np.bincount(buckets, minlength=3)
+    avg_win_r = float(sum_r[2] / cnt_r[2]) if cnt_r[2] else 0.0
+    avg_loss_r = float(-sum_r[0] / cnt_r[0]) if cnt_r[0] else 0.0
     expectancy_r = (winrate/100.0) * avg_win_r - \
         (1 - winrate/100.0) * avg_loss_r
 
+    # Только встроенные int/float: round() от numpy-скаляра вернул бы numpy-скаляр
     return {
         "count": int(len(df)),
         "winrate": round(winrate, 2),
-        "profit_factor": round(profit_factor, 2) if np.isfinite(profit_factor) else float("inf"),
+        "profit_factor": profit_factor,
         "expectancy_r": round(expectancy_r, 3),
-        "avg_r": round(df["R"].mean(), 3),
+        "avg_r": round(float(np.nanmean(r)), 3),
         "total_pnl": round(total_pnl, 2),
-        "best_trade": round(df["pnl"].max(), 2),
-        "worst_trade": round(df["pnl"].min(), 2),
+        "best_trade": round(float(np.nanmax(pnl)), 2),
+        "worst_trade": round(float(np.nanmin(pnl)), 2),
     }
 
 
 def equity_curve(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
-    tmp = df.sort_values(["trade_date", "created_at"]).copy()
-    tmp["cum_pnl"] = tmp["pnl"].cumsum()
-    return tmp[["trade_date", "created_at", "cum_pnl"]]
+    # sort_values и так возвращает новый кадр — проецируем колонки до сортировки
+    tmp = df[["trade_date", "created_at", "pnl"]].sort_values(
+        ["trade_date", "created_at"])
+    return tmp.assign(cum_pnl=tmp["pnl"].cumsum()).drop(columns="pnl")